@@ -623,6 +623,42 @@ class MessageProcessor:
         else:
             parse_data = self._parse_message_with_graph(message, only_output_properties)
 
+        self._log_and_check_parse_data(parse_data)
+
+        return parse_data
+
+    async def parse_messages(
+        self, messages: List[UserMessage], only_output_properties: bool = True
+    ) -> List[Dict[Text, Any]]:
+        """Interprets the passed messages.
+
+        Unlike calling `parse_message` for every message, this runs the NLU
+        components only once for all messages.
+
+        Args:
+            messages: Messages to handle.
+            only_output_properties: If `True`, restrict the output to
+                Message.only_output_properties.
+
+        Returns:
+            Parsed data extracted from the messages in the order of `messages`.
+        """
+        if self.http_interpreter:
+            return [
+                await self.parse_message(message, only_output_properties)
+                for message in messages
+            ]
+
+        parse_data_of_messages = self._parse_messages_with_graph(
+            messages, only_output_properties
+        )
+        for parse_data in parse_data_of_messages:
+            self._log_and_check_parse_data(parse_data)
+
+        return parse_data_of_messages
+
+    def _log_and_check_parse_data(self, parse_data: Dict[Text, Any]) -> None:
+        """Logs the parse data and warns about features unknown to the domain."""
         logger.debug(
             "Received user message '{}' with intent '{}' "
             "and entities '{}'".format(
@@ -632,8 +668,6 @@ class MessageProcessor:
 
         self._check_for_unseen_features(parse_data)
 
-        return parse_data
-
     def _parse_message_with_graph(
         self, message: UserMessage, only_output_properties: bool = True
     ) -> Dict[Text, Any]:
@@ -645,21 +679,37 @@ class MessageProcessor:
         Returns:
             Parsed data extracted from the message.
         """
+        return self._parse_messages_with_graph([message], only_output_properties)[0]
+
+    def _parse_messages_with_graph(
+        self, messages: List[UserMessage], only_output_properties: bool = True
+    ) -> List[Dict[Text, Any]]:
+        """Interprets the passed messages with a single run of the graph.
+
+        Arguments:
+            messages: Messages to handle
+
+        Returns:
+            Parsed data extracted from the messages.
+        """
         results = self.graph_runner.run(
-            inputs={PLACEHOLDER_MESSAGE: [message]},
+            inputs={PLACEHOLDER_MESSAGE: messages},
             targets=[self.model_metadata.nlu_target],
         )
         parsed_messages = results[self.model_metadata.nlu_target]
-        parsed_message = parsed_messages[0]
-        parse_data = {
-            TEXT: "",
-            INTENT: {INTENT_NAME_KEY: None, PREDICTED_CONFIDENCE_KEY: 0.0},
-            ENTITIES: [],
-        }
-        parse_data.update(
-            parsed_message.as_dict(only_output_properties=only_output_properties)
-        )
-        return parse_data
+
+        parse_data_of_messages = []
+        for parsed_message in parsed_messages:
+            parse_data = {
+                TEXT: "",
+                INTENT: {INTENT_NAME_KEY: None, PREDICTED_CONFIDENCE_KEY: 0.0},
+                ENTITIES: [],
+            }
+            parse_data.update(
+                parsed_message.as_dict(only_output_properties=only_output_properties)
+            )
+            parse_data_of_messages.append(parse_data)
+        return parse_data_of_messages
 
     async def _handle_message_with_tracker(
         self, message: UserMessage, tracker: DialogueStateTracker
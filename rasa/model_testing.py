@@ -1,8 +1,11 @@
+import itertools
 import logging
 import os
 from typing import Text, Dict, Optional, List, Any, Iterable, Tuple, Union
 from pathlib import Path
 
+import numpy as np
+
 from rasa.core.agent import Agent
 from rasa.engine.storage.local_model_storage import LocalModelStorage
 import rasa.shared.utils.cli
@@ -350,28 +353,96 @@ def get_evaluation_metrics(
     Returns:
         Report from sklearn, precision, f1, and accuracy values.
     """
-    from sklearn import metrics
-
     targets = clean_labels(targets)
     predictions = clean_labels(predictions)
 
-    labels = get_unique_labels(targets, exclude_label)
-    if not labels:
+    label_names, (target_ids, prediction_ids) = encode_labels([targets, predictions])
+
+    return get_encoded_evaluation_metrics(
+        label_names, target_ids, prediction_ids, output_dict, exclude_label
+    )
+
+
+def get_encoded_evaluation_metrics(
+    label_names: np.ndarray,
+    target_ids: np.ndarray,
+    prediction_ids: np.ndarray,
+    output_dict: bool = False,
+    exclude_label: Optional[Text] = None,
+) -> Tuple[Union[Text, Dict[Text, Dict[Text, float]]], float, float, float]:
+    """Compute the f1, precision, accuracy and summary report of encoded labels.
+
+    Args:
+        label_names: the label names of the label ids, see `encode_labels`
+        target_ids: the encoded target labels
+        prediction_ids: the encoded predicted labels
+        output_dict: if True sklearn returns a summary report as dict, if False the
+          report is in string format
+        exclude_label: labels to exclude from evaluation
+
+    Returns:
+        Report from sklearn, precision, f1, and accuracy values.
+    """
+    from sklearn import metrics
+
+    label_ids = np.unique(target_ids)
+    if exclude_label:
+        label_ids = label_ids[label_names[label_ids] != exclude_label]
+    if not label_ids.size:
         logger.warning("No labels to evaluate. Skip evaluation.")
         return {}, 0.0, 0.0, 0.0
 
     report = metrics.classification_report(
-        targets, predictions, labels=labels, output_dict=output_dict
+        target_ids,
+        prediction_ids,
+        labels=label_ids,
+        target_names=[str(label) for label in label_names[label_ids]],
+        output_dict=output_dict,
     )
-    precision = metrics.precision_score(
-        targets, predictions, labels=labels, average="weighted"
+    precision, _, f1, _ = metrics.precision_recall_fscore_support(
+        target_ids, prediction_ids, labels=label_ids, average="weighted"
     )
-    f1 = metrics.f1_score(targets, predictions, labels=labels, average="weighted")
-    accuracy = metrics.accuracy_score(targets, predictions)
+    accuracy = metrics.accuracy_score(target_ids, prediction_ids)
 
     return report, precision, f1, accuracy
 
 
+def encode_labels(label_lists: List[List[Any]]) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """Encodes several lists of labels with one shared set of integer ids.
+
+    Args:
+        label_lists: lists of labels, e.g. the target and the predicted labels
+
+    Returns:
+        The sorted unique labels and, for every list, the ids of its labels.
+    """
+    label_names, label_ids = np.unique(
+        np.asarray(list(itertools.chain.from_iterable(label_lists))),
+        return_inverse=True,
+    )
+    split_indices = np.cumsum([len(labels) for labels in label_lists[:-1]])
+    return label_names, np.split(label_ids, split_indices)
+
+
+def get_confusion_matrix(
+    target_ids: np.ndarray, prediction_ids: np.ndarray, num_labels: int
+) -> np.ndarray:
+    """Counts the (target, prediction) pairs of integer encoded labels.
+
+    Args:
+        target_ids: the encoded target labels
+        prediction_ids: the encoded predicted labels
+        num_labels: the number of distinct label ids
+
+    Returns:
+        The confusion matrix with the target labels as rows and the predicted
+        labels as columns.
+    """
+    return np.bincount(
+        target_ids * num_labels + prediction_ids, minlength=num_labels ** 2
+    ).reshape(num_labels, num_labels)
+
+
 def clean_labels(labels: Iterable[Text]) -> List[Text]:
     """Remove `None` labels. sklearn metrics do not support them.
 
@@ -381,6 +452,9 @@ def clean_labels(labels: Iterable[Text]) -> List[Text]:
     Returns:
         Cleaned labels.
     """
+    if isinstance(labels, list) and None not in labels:
+        return labels
+
     return [label if label is not None else "" for label in labels]
 
 
@@ -1,3 +1,5 @@
+import asyncio
+import concurrent.futures
 import itertools
 import os
 import logging
@@ -8,6 +10,7 @@ import numpy as np
 from collections import defaultdict, namedtuple
 from tqdm import tqdm
 from typing import (
+    AsyncIterator,
     Iterable,
     Iterator,
     Tuple,
@@ -26,6 +29,7 @@ from rasa import telemetry
 from rasa.core.agent import Agent
 from rasa.core.channels import UserMessage
 from rasa.core.processor import MessageProcessor
+from rasa.shared.nlu.training_data.message import Message
 from rasa.shared.nlu.training_data.training_data import TrainingData
 import rasa.shared.utils.io
 import rasa.utils.plotting as plot_utils
@@ -82,6 +86,12 @@ ENTITY_PROCESSORS = {"EntitySynonymMapper", "ResponseSelector"}
 
 EXTRACTORS_WITH_CONFIDENCES = {"CRFEntityExtractor", "DIETClassifier"}
 
+# Extractors which can't predict overlapping entities
+EXTRACTORS_WITHOUT_OVERLAP_SUPPORT = {"CRFEntityExtractor"}
+
+# Number of test examples which are parsed together by the NLU components
+PARSE_BATCH_SIZE = 64
+
 
 class CVEvaluationResult(NamedTuple):
     """Stores NLU cross-validation results."""
@@ -109,6 +119,14 @@ EntityEvaluationResult = namedtuple(
 IntentMetrics = Dict[Text, List[float]]
 EntityMetrics = Dict[Text, Dict[Text, List[float]]]
 ResponseSelectionMetrics = Dict[Text, List[float]]
+ComputedMetrics = Tuple[
+    IntentMetrics,
+    EntityMetrics,
+    ResponseSelectionMetrics,
+    List[IntentEvaluationResult],
+    List[EntityEvaluationResult],
+    List[ResponseSelectionEvaluationResult],
+]
 
 
 def log_evaluation_table(
@@ -131,17 +149,14 @@ def remove_empty_intent_examples(
 
     Returns: intent evaluation results
     """
-    filtered = []
-    for r in intent_results:
-        # substitute None values with empty string
-        # to enable sklearn evaluation
-        if r.intent_prediction is None:
-            r = r._replace(intent_prediction="")
-
-        if r.intent_target != "" and r.intent_target is not None:
-            filtered.append(r)
-
-    return filtered
+    # `get_eval_data` already stores missing predictions as empty strings, only
+    # results created elsewhere may still need the substitution (sklearn can't
+    # handle `None` values)
+    return [
+        r if r.intent_prediction is not None else r._replace(intent_prediction="")
+        for r in intent_results
+        if r.intent_target
+    ]
 
 
 def remove_empty_response_examples(
@@ -204,18 +219,20 @@ def write_intent_successes(
         successes_filename: filename of file to save successful predictions to
     """
     successes = [
-        {
-            "text": r.message,
-            "intent": r.intent_target,
-            "intent_prediction": {
-                INTENT_NAME_KEY: r.intent_prediction,
-                "confidence": r.confidence,
-            },
-        }
+        _intent_result_as_dict(r)
         for r in intent_results
         if r.intent_target == r.intent_prediction
     ]
+    _write_intent_successes(successes, successes_filename)
 
+
+def _write_intent_successes(successes: List[Dict], successes_filename: Text) -> None:
+    """Write successful intent predictions to a file.
+
+    Args:
+        successes: Serializable successful predictions.
+        successes_filename: filename of file to save successful predictions to
+    """
     if successes:
         rasa.shared.utils.io.dump_obj_as_json_to_file(successes_filename, successes)
         logger.info(f"Successful intent predictions saved to {successes_filename}.")
@@ -243,19 +260,41 @@ def _write_errors(errors: List[Dict], errors_filename: Text, error_type: Text) -
         logger.info(f"Every {error_type} was predicted correctly by the model.")
 
 
-def _get_intent_errors(intent_results: List[IntentEvaluationResult]) -> List[Dict]:
-    return [
-        {
-            "text": r.message,
-            "intent": r.intent_target,
-            "intent_prediction": {
-                INTENT_NAME_KEY: r.intent_prediction,
-                "confidence": r.confidence,
-            },
-        }
-        for r in intent_results
-        if r.intent_target != r.intent_prediction
-    ]
+def _intent_result_as_dict(intent_result: IntentEvaluationResult) -> Dict:
+    return {
+        "text": intent_result.message,
+        "intent": intent_result.intent_target,
+        "intent_prediction": {
+            INTENT_NAME_KEY: intent_result.intent_prediction,
+            "confidence": intent_result.confidence,
+        },
+    }
+
+
+def _collect_intent_predictions(
+    intent_results: List[IntentEvaluationResult], collect_successes: bool = True
+) -> Tuple[List[Dict], List[Dict], List[float], List[float]]:
+    """Splits intent results into correct and incorrect predictions in one pass.
+
+    Args:
+        intent_results: intent evaluation results
+        collect_successes: if False the correct predictions aren't serialized
+
+    Returns:
+        Serializable correct and incorrect predictions as well as the confidences
+        of the correct and incorrect predictions.
+    """
+    successes, errors, success_confidences, error_confidences = [], [], [], []
+    for r in intent_results:
+        if r.intent_target == r.intent_prediction:
+            if collect_successes:
+                successes.append(_intent_result_as_dict(r))
+            success_confidences.append(r.confidence)
+        else:
+            errors.append(_intent_result_as_dict(r))
+            error_confidences.append(r.confidence)
+
+    return successes, errors, success_confidences, error_confidences
 
 
 def write_response_successes(
@@ -522,22 +561,21 @@ def _add_confused_labels_to_report(
 
     Returns: updated evaluation report
     """
-    if exclude_labels is None:
-        exclude_labels = []
+    excluded_labels = set(exclude_labels) if exclude_labels else set()
 
     # sort confusion matrix by false positives
     indices = np.argsort(confusion_matrix, axis=1)
     n_candidates = min(3, len(labels))
 
     for label in labels:
-        if label in exclude_labels:
+        if label in excluded_labels:
             continue
         # it is possible to predict intent 'None'
         if report.get(label):
             report[label]["confused_with"] = {}
 
     for i, label in enumerate(labels):
-        if label in exclude_labels:
+        if label in excluded_labels:
             continue
         for j in range(n_candidates):
             label_idx = indices[i, -(1 + j)]
@@ -545,7 +583,7 @@ def _add_confused_labels_to_report(
             false_positives = int(confusion_matrix[i, label_idx])
             if (
                 false_pos_label != label
-                and false_pos_label not in exclude_labels
+                and false_pos_label not in excluded_labels
                 and false_positives > 0
             ):
                 report[label]["confused_with"][false_pos_label] = false_positives
@@ -598,12 +636,20 @@ def evaluate_intents(
     if output_directory:
         _dump_report(output_directory, "intent_report.json", report)
 
+    (
+        intent_successes,
+        intent_errors,
+        success_confidences,
+        error_confidences,
+    ) = _collect_intent_predictions(
+        intent_results, collect_successes=bool(successes and output_directory)
+    )
+
     if successes and output_directory:
         successes_filename = os.path.join(output_directory, "intent_successes.json")
         # save classified samples to file for debugging
-        write_intent_successes(intent_results, successes_filename)
+        _write_intent_successes(intent_successes, successes_filename)
 
-    intent_errors = _get_intent_errors(intent_results)
     if errors and output_directory:
         errors_filename = os.path.join(output_directory, "intent_errors.json")
         _write_errors(intent_errors, errors_filename, "intent")
@@ -624,12 +670,10 @@ def evaluate_intents(
         histogram_filename = "intent_histogram.png"
         if output_directory:
             histogram_filename = os.path.join(output_directory, histogram_filename)
-        plot_attribute_confidences(
-            intent_results,
-            histogram_filename,
-            "intent_target",
-            "intent_prediction",
+        plot_utils.plot_paired_histogram(
+            [success_confidences, error_confidences],
             title="Intent Prediction Confidence Distribution",
+            output_file=histogram_filename,
         )
 
     predictions = [
@@ -659,18 +703,27 @@ def _calculate_report(
     report_as_dict: Optional[bool] = None,
     exclude_label: Optional[Text] = None,
 ) -> Tuple[Union[Text, Dict], float, float, float, np.ndarray, List[Text]]:
-    from rasa.model_testing import get_evaluation_metrics
-    import sklearn.metrics
-    import sklearn.utils.multiclass
+    from rasa.model_testing import (
+        clean_labels,
+        encode_labels,
+        get_confusion_matrix,
+        get_encoded_evaluation_metrics,
+    )
 
-    confusion_matrix = sklearn.metrics.confusion_matrix(targets, predictions)
-    labels = sklearn.utils.multiclass.unique_labels(targets, predictions)
+    labels, (target_ids, prediction_ids) = encode_labels(
+        [clean_labels(targets), clean_labels(predictions)]
+    )
+    confusion_matrix = get_confusion_matrix(target_ids, prediction_ids, len(labels))
 
     if report_as_dict is None:
         report_as_dict = bool(output_directory)
 
-    report, precision, f1, accuracy = get_evaluation_metrics(
-        targets, predictions, output_dict=report_as_dict, exclude_label=exclude_label,
+    report, precision, f1, accuracy = get_encoded_evaluation_metrics(
+        labels,
+        target_ids,
+        prediction_ids,
+        output_dict=report_as_dict,
+        exclude_label=exclude_label,
     )
 
     if report_as_dict:
@@ -706,13 +759,42 @@ def merge_labels(
 
     Returns: concatenated predictions
     """
+    label_lists = _label_lists_of(aligned_predictions, extractor)
+    return list(itertools.chain.from_iterable(label_lists))
 
-    if extractor:
-        label_lists = [ap["extractor_labels"][extractor] for ap in aligned_predictions]
-    else:
-        label_lists = [ap["target_labels"] for ap in aligned_predictions]
 
-    return list(itertools.chain(*label_lists))
+def _merge_and_substitute_labels(
+    aligned_predictions: List[Dict],
+    extractor: Optional[Text] = None,
+    old: Text = NO_ENTITY_TAG,
+    new: Text = NO_ENTITY,
+) -> List[Text]:
+    """Concatenates all labels of the aligned predictions and replaces a label name.
+
+    Every `old` label is replaced by `new` in the same pass over the labels.
+
+    Args:
+        aligned_predictions: aligned predictions
+        extractor: entity extractor name
+        old: old label name that should be replaced
+        new: new label name
+
+    Returns: concatenated and updated labels
+    """
+    label_lists = _label_lists_of(aligned_predictions, extractor)
+    return [
+        new if label == old else label
+        for label in itertools.chain.from_iterable(label_lists)
+    ]
+
+
+def _label_lists_of(
+    aligned_predictions: List[Dict], extractor: Optional[Text] = None
+) -> Iterator[List[Text]]:
+    """Returns the target label lists or the label lists of the given extractor."""
+    if extractor:
+        return (ap["extractor_labels"][extractor] for ap in aligned_predictions)
+    return (ap["target_labels"] for ap in aligned_predictions)
 
 
 def merge_confidences(
@@ -730,8 +812,8 @@ def merge_confidences(
     Returns: concatenated confidences
     """
 
-    label_lists = [ap["confidences"][extractor] for ap in aligned_predictions]
-    return list(itertools.chain(*label_lists))
+    label_lists = (ap["confidences"][extractor] for ap in aligned_predictions)
+    return list(itertools.chain.from_iterable(label_lists))
 
 
 def substitute_labels(labels: List[Text], old: Text, new: Text) -> List[Text]:
@@ -865,16 +947,18 @@ def evaluate_entities(
 
     Returns: dictionary with evaluation results
     """
+    if not extractors:
+        # there is nothing to evaluate, hence don't align the target labels
+        return {}
+
     aligned_predictions = align_all_entity_predictions(entity_results, extractors)
-    merged_targets = merge_labels(aligned_predictions)
-    merged_targets = substitute_labels(merged_targets, NO_ENTITY_TAG, NO_ENTITY)
+    merged_targets = _merge_and_substitute_labels(aligned_predictions)
 
     result = {}
 
     for extractor in extractors:
-        merged_predictions = merge_labels(aligned_predictions, extractor)
-        merged_predictions = substitute_labels(
-            merged_predictions, NO_ENTITY_TAG, NO_ENTITY
+        merged_predictions = _merge_and_substitute_labels(
+            aligned_predictions, extractor
         )
 
         logger.info(f"Evaluation for entity extractor: {extractor} ")
@@ -960,10 +1044,10 @@ def does_token_cross_borders(token: Token, entity: Dict) -> bool:
 
 def determine_intersection(token: Token, entity: Dict) -> int:
     """Calculates how many characters a given token and entity share."""
+    if entity["end"] <= token.start or entity["start"] >= token.end:
+        return 0
 
-    pos_token = set(range(token.start, token.end))
-    pos_entity = set(range(entity["start"], entity["end"]))
-    return len(pos_token.intersection(pos_entity))
+    return max(0, min(token.end, entity["end"]) - max(token.start, entity["start"]))
 
 
 def do_entities_overlap(entities: List[Dict]) -> bool:
@@ -976,7 +1060,17 @@ def do_entities_overlap(entities: List[Dict]) -> bool:
 
     Returns: true if entities overlap, false otherwise.
     """
-    sorted_entities = sorted(entities, key=lambda e: e["start"])
+    return _do_sorted_entities_overlap(sorted(entities, key=lambda e: e["start"]))
+
+
+def _do_sorted_entities_overlap(sorted_entities: List[Dict]) -> bool:
+    """Checks if entities which are sorted by their start position overlap.
+
+    Args:
+        sorted_entities: list of entities sorted by their start position
+
+    Returns: true if entities overlap, false otherwise.
+    """
     for i in range(len(sorted_entities) - 1):
         curr_ent = sorted_entities[i]
         next_ent = sorted_entities[i + 1]
@@ -1093,14 +1187,92 @@ def determine_entity_for_token(
     return pick_best_entity_fit(token, candidates)
 
 
+def _determine_entities_for_tokens(
+    tokens: List[Token],
+    entities: List[Dict[Text, Any]],
+    extractors: Optional[Set[Text]] = None,
+) -> List[Optional[Dict[Text, Any]]]:
+    """Determines the best fitting entity for every token of a message.
+
+    Sorts the entities once by their start position and sweeps over them, so that
+    a token only looks at the entities which start before the token ends.
+
+    Args:
+        tokens: the tokens of a message
+        entities: entities found by a single extractor
+        extractors: list of extractors
+
+    Returns:
+        the best fitting entity (or `None`) for every token
+    """
+    if not tokens or not entities:
+        return [None] * len(tokens)
+
+    # keep the original position of every entity to break ties the same way
+    # `pick_best_entity_fit` does
+    original_positions = sorted(
+        range(len(entities)), key=lambda i: entities[i]["start"]
+    )
+    sorted_entities = [entities[i] for i in original_positions]
+
+    if not do_extractors_support_overlap(extractors) and _do_sorted_entities_overlap(
+        sorted_entities
+    ):
+        raise ValueError("The possible entities should not overlap.")
+
+    best_entities = []
+    first_candidate = 0
+    previous_start = tokens[0].start
+    for token in tokens:
+        if token.start < previous_start:
+            first_candidate = 0
+        previous_start = token.start
+
+        # entities which end before the current token can't intersect with the
+        # current or any following token
+        while (
+            first_candidate < len(sorted_entities)
+            and sorted_entities[first_candidate]["end"] <= token.start
+        ):
+            first_candidate += 1
+
+        best_entity = None
+        best_index = -1
+        best_intersection = 0
+        for position in range(first_candidate, len(sorted_entities)):
+            entity = sorted_entities[position]
+            if entity["start"] >= token.end:
+                break
+            index = original_positions[position]
+
+            intersection = determine_intersection(token, entity)
+            if not 0 < intersection <= len(token.text):
+                continue
+            if intersection < len(token.text):
+                logger.debug(
+                    "Token boundary error for token {}({}, {}) "
+                    "and entity {}"
+                    "".format(token.text, token.start, token.end, entity)
+                )
+
+            if intersection > best_intersection or (
+                intersection == best_intersection and index < best_index
+            ):
+                best_entity = entity
+                best_index = index
+                best_intersection = intersection
+
+        best_entities.append(best_entity)
+
+    return best_entities
+
+
 def do_extractors_support_overlap(extractors: Optional[Set[Text]]) -> bool:
     """Checks if extractors support overlapping entities"""
     if extractors is None:
         return False
 
-    from rasa.nlu.extractors.crf_entity_extractor import CRFEntityExtractor
-
-    return CRFEntityExtractor.__name__ not in extractors
+    return EXTRACTORS_WITHOUT_OVERLAP_SUPPORT.isdisjoint(extractors)
 
 
 def align_entity_predictions(
@@ -1119,23 +1291,36 @@ def align_entity_predictions(
     Returns: dictionary containing the true token labels and token labels
              from the extractors
     """
-    true_token_labels = []
-    entities_by_extractors: Dict[Text, List] = {
-        extractor: [] for extractor in extractors
-    }
+    entities_by_extractors: Dict[Text, List] = defaultdict(list)
     for p in result.entity_predictions:
-        entities_by_extractors[p[EXTRACTOR]].append(p)
-    extractor_labels: Dict[Text, List] = {extractor: [] for extractor in extractors}
-    extractor_confidences: Dict[Text, List] = {
-        extractor: [] for extractor in extractors
-    }
-    for t in result.tokens:
-        true_token_labels.append(_concat_entity_labels(t, result.entity_targets))
-        for extractor, entities in entities_by_extractors.items():
-            extracted_labels = _concat_entity_labels(t, entities, {extractor})
-            extracted_confidences = _get_entity_confidences(t, entities, {extractor})
-            extractor_labels[extractor].append(extracted_labels)
-            extractor_confidences[extractor].append(extracted_confidences)
+        if p[EXTRACTOR] in extractors:
+            entities_by_extractors[p[EXTRACTOR]].append(p)
+    extractor_labels: Dict[Text, List] = {}
+    extractor_confidences: Dict[Text, List] = {}
+
+    true_token_labels = [
+        _concat_labels_of_entity(entity)
+        for entity in _determine_entities_for_tokens(
+            result.tokens, result.entity_targets
+        )
+    ]
+    for extractor in extractors:
+        entities = entities_by_extractors.get(extractor)
+        if not entities:
+            # no predictions of this extractor, hence every token is unlabeled
+            extractor_labels[extractor] = [NO_ENTITY_TAG] * len(result.tokens)
+            extractor_confidences[extractor] = [0.0] * len(result.tokens)
+            continue
+
+        token_entities = _determine_entities_for_tokens(
+            result.tokens, entities, {extractor}
+        )
+        extractor_labels[extractor] = [
+            _concat_labels_of_entity(entity) for entity in token_entities
+        ]
+        extractor_confidences[extractor] = [
+            _get_confidence_of_entity(entity) for entity in token_entities
+        ]
 
     return {
         "target_labels": true_token_labels,
@@ -1144,60 +1329,44 @@ def align_entity_predictions(
     }
 
 
-def _concat_entity_labels(
-    token: Token, entities: List[Dict], extractors: Optional[Set[Text]] = None
-) -> Text:
-    """Concatenate labels for entity type, role, and group for evaluation.
+def _concat_labels_of_entity(entity: Optional[Dict[Text, Any]]) -> Text:
+    """Concatenates the entity type, group, and role labels of an entity.
 
     In order to calculate metrics also for entity type, role, and group we need to
     concatenate their labels. For example, 'location.destination'. This allows
     us to report metrics for every combination of entity type, role, and group.
 
     Args:
-        token: the token we are looking at
-        entities: the available entities
-        extractors: the extractor of interest
+        entity: the entity which was picked for a token (if any)
 
     Returns:
-        the entity label of the provided token
+        the concatenated entity label
     """
-    entity_label = determine_token_labels(
-        token, entities, extractors, ENTITY_ATTRIBUTE_TYPE
-    )
-    group_label = determine_token_labels(
-        token, entities, extractors, ENTITY_ATTRIBUTE_GROUP
-    )
-    role_label = determine_token_labels(
-        token, entities, extractors, ENTITY_ATTRIBUTE_ROLE
-    )
-
-    if entity_label == role_label == group_label == NO_ENTITY_TAG:
+    if entity is None:
         return NO_ENTITY_TAG
 
-    labels = [entity_label, group_label, role_label]
-    labels = [label for label in labels if label != NO_ENTITY_TAG]
+    labels = [
+        entity.get(ENTITY_ATTRIBUTE_TYPE),
+        entity.get(ENTITY_ATTRIBUTE_GROUP),
+        entity.get(ENTITY_ATTRIBUTE_ROLE),
+    ]
+    labels = [label for label in labels if label and label != NO_ENTITY_TAG]
 
-    return ".".join(labels)
+    if not labels:
+        return NO_ENTITY_TAG
 
+    return ".".join(labels)
 
-def _get_entity_confidences(
-    token: Token, entities: List[Dict], extractors: Optional[Set[Text]] = None
-) -> float:
-    """Get the confidence value of the best fitting entity.
 
-    If multiple confidence values are present, e.g. for type, role, group, we
-    pick the lowest confidence value.
+def _get_confidence_of_entity(entity: Optional[Dict[Text, Any]]) -> float:
+    """Get the lowest confidence value of type, role, and group of an entity.
 
     Args:
-        token: the token we are looking at
-        entities: the available entities
-        extractors: the extractor of interest
+        entity: the entity which was picked for a token (if any)
 
     Returns:
         the confidence value
     """
-    entity = determine_entity_for_token(token, entities, extractors)
-
     if entity is None:
         return 0.0
 
@@ -1224,15 +1393,80 @@ def align_all_entity_predictions(
     Returns: list of dictionaries containing the true token labels and token
     labels from the extractors
     """
-    aligned_predictions = []
-    for result in entity_results:
-        aligned_predictions.append(align_entity_predictions(result, extractors))
+    return [align_entity_predictions(result, extractors) for result in entity_results]
+
 
-    return aligned_predictions
+async def _parse_examples(
+    processor: MessageProcessor,
+    examples: List[Message],
+    n_jobs: int = 1,
+    batch_size: int = PARSE_BATCH_SIZE,
+) -> AsyncIterator[Tuple[Message, Dict[Text, Any]]]:
+    """Parses the examples and yields them together with their parse results.
+
+    Args:
+        processor: the processor
+        examples: the examples which should be parsed
+        n_jobs: number of threads which parse batches of examples concurrently.
+            Negative values follow the `joblib` convention, e.g. `-1` to use as
+            many threads as there are CPUs.
+        batch_size: number of examples which are parsed with a single run of the
+            NLU components
+
+    Returns: the examples and their parse results in the order of `examples`
+
+    Raises:
+        ValueError: if `n_jobs` is `0`
+    """
+    from joblib import effective_n_jobs
+
+    n_jobs = effective_n_jobs(n_jobs)
+
+    batches = [
+        examples[index : index + batch_size]
+        for index in range(0, len(examples), batch_size)
+    ]
+
+    async def parse(batch: List[Message]) -> List[Dict[Text, Any]]:
+        return await processor.parse_messages(
+            [UserMessage(text=example.get(TEXT)) for example in batch],
+            only_output_properties=False,
+        )
+
+    # the HTTP interpreter is bound to the running event loop and hence can't be
+    # used from other threads
+    if n_jobs == 1 or processor.http_interpreter:
+        with tqdm(total=len(examples)) as progress:
+            for batch in batches:
+                results = await parse(batch)
+                progress.update(len(batch))
+                for example, result in zip(batch, results):
+                    yield example, result
+        return
+
+    # Use a sync wrapper for our `async` function as `run_in_executor` only supports
+    # sync functions
+    def parse_in_thread(batch: List[Message]) -> List[Dict[Text, Any]]:
+        return asyncio.run(parse(batch))
+
+    loop = asyncio.get_running_loop()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        futures = [
+            loop.run_in_executor(pool, parse_in_thread, batch) for batch in batches
+        ]
+        with tqdm(total=len(examples)) as progress:
+            for batch, future in zip(batches, futures):
+                results = await future
+                progress.update(len(batch))
+                for example, result in zip(batch, results):
+                    yield example, result
 
 
 async def get_eval_data(
-    processor: MessageProcessor, test_data: TrainingData
+    processor: MessageProcessor,
+    test_data: TrainingData,
+    n_jobs: int = 1,
+    batch_size: int = PARSE_BATCH_SIZE,
 ) -> Tuple[
     List[IntentEvaluationResult],
     List[ResponseSelectionEvaluationResult],
@@ -1248,8 +1482,16 @@ async def get_eval_data(
     Args:
         processor: the processor
         test_data: test data
+        n_jobs: number of threads which run the model concurrently. Negative
+            values follow the `joblib` convention, e.g. `-1` to use as many threads
+            as there are CPUs. Predictions are parsed one after another by default.
+        batch_size: number of examples which are parsed with a single run of the
+            model
 
     Returns: intent, response, and entity evaluation results
+
+    Raises:
+        ValueError: if `n_jobs` is `0`
     """
     logger.info("Running model for predictions:")
 
@@ -1265,23 +1507,25 @@ async def get_eval_data(
     should_eval_response_selection = len(response_labels) >= 2
     should_eval_entities = len(test_data.entity_examples) > 0
 
-    for example in tqdm(test_data.nlu_examples):
-        result = await processor.parse_message(
-            UserMessage(text=example.get(TEXT)), only_output_properties=False
-        )
+    async for example, result in _parse_examples(
+        processor, test_data.nlu_examples, n_jobs, batch_size
+    ):
         _remove_entities_of_extractors(result, PRETRAINED_EXTRACTORS)
+        intent_target = example.get(INTENT, "")
+        text = result.get(TEXT)
+
         if should_eval_intents:
             if fallback_classifier.is_fallback_classifier_prediction(result):
                 # Revert fallback prediction to not shadow
                 # the wrongly predicted intent
                 # during the test phase.
                 result = fallback_classifier.undo_fallback_prediction(result)
-            intent_prediction = result.get(INTENT, {})
+            intent_prediction = result.get(INTENT) or {}
             intent_results.append(
                 IntentEvaluationResult(
-                    example.get(INTENT, ""),
-                    intent_prediction.get(INTENT_NAME_KEY),
-                    result.get(TEXT),
+                    intent_target,
+                    intent_prediction.get(INTENT_NAME_KEY) or "",
+                    text,
                     intent_prediction.get("confidence"),
                 )
             )
@@ -1289,7 +1533,6 @@ async def get_eval_data(
         if should_eval_response_selection:
             # including all examples here. Empty response examples are filtered at the
             # time of metric calculation
-            intent_target = example.get(INTENT, "")
             selector_properties = result.get(RESPONSE_SELECTOR_PROPERTY_NAME, {})
             response_selector_retrieval_intents = selector_properties.get(
                 RESPONSE_SELECTOR_RETRIEVAL_INTENTS, set()
@@ -1312,7 +1555,7 @@ async def get_eval_data(
                 ResponseSelectionEvaluationResult(
                     intent_response_key_target,
                     response_prediction.get(INTENT_RESPONSE_KEY),
-                    result.get(TEXT),
+                    text,
                     response_prediction.get(PREDICTED_CONFIDENCE_KEY),
                 )
             )
@@ -1323,7 +1566,7 @@ async def get_eval_data(
                     example.get(ENTITIES, []),
                     result.get(ENTITIES, []),
                     result.get(TOKENS_NAMES[TEXT], []),
-                    result.get(TEXT),
+                    text,
                 )
             )
 
@@ -1361,6 +1604,7 @@ async def run_evaluation(
     errors: bool = False,
     disable_plotting: bool = False,
     report_as_dict: Optional[bool] = None,
+    n_jobs: int = 1,
 ) -> Dict:  # pragma: no cover
     """Evaluate intent classification, response selection and entity extraction.
 
@@ -1375,6 +1619,9 @@ async def run_evaluation(
             If `False` the report is returned in a human-readable text format. If `None`
             `report_as_dict` is considered as `True` in case an `output_directory` is
             given.
+        n_jobs: number of threads which run the model concurrently. Negative
+            values follow the `joblib` convention, e.g. `-1` to use as many threads
+            as there are CPUs. Predictions are parsed one after another by default.
 
     Returns: dictionary containing evaluation results
     """
@@ -1396,7 +1643,7 @@ async def run_evaluation(
         rasa.shared.utils.io.create_directory(output_directory)
 
     (intent_results, response_selection_results, entity_results) = await get_eval_data(
-        processor, test_data
+        processor, test_data, n_jobs
     )
 
     if intent_results:
@@ -1447,15 +1694,16 @@ def generate_folds(
     from sklearn.model_selection import StratifiedKFold
 
     skf = StratifiedKFold(n_splits=n, shuffle=True)
-    x = training_data.intent_examples
+    examples = training_data.intent_examples
+    x = np.asarray(examples, dtype=object)
 
     # Get labels as they appear in the training data because we want a
     # stratified split on all intents(including retrieval intents if they exist)
-    y = [example.get_full_intent() for example in x]
+    y = list(map(Message.get_full_intent, examples))
     for i_fold, (train_index, test_index) in enumerate(skf.split(x, y)):
         logger.debug(f"Fold: {i_fold}")
-        train = [x[i] for i in train_index]
-        test = [x[i] for i in test_index]
+        train = x[train_index].tolist()
+        test = x[test_index].tolist()
         yield (
             TrainingData(
                 training_examples=train,
@@ -1500,6 +1748,44 @@ async def combine_result(
         entity_results: entity evaluation results
         response_selection_results: reponse selection evaluation results
 
+    Returns: intent, entity, and response selection metrics
+    """
+    return _combine_computed_metrics(
+        intent_metrics,
+        entity_metrics,
+        response_selection_metrics,
+        await compute_metrics(processor, data),
+        intent_results,
+        entity_results,
+        response_selection_results,
+    )
+
+
+def _combine_computed_metrics(
+    intent_metrics: IntentMetrics,
+    entity_metrics: EntityMetrics,
+    response_selection_metrics: ResponseSelectionMetrics,
+    computed_metrics: ComputedMetrics,
+    intent_results: Optional[List[IntentEvaluationResult]] = None,
+    entity_results: Optional[List[EntityEvaluationResult]] = None,
+    response_selection_results: Optional[
+        List[ResponseSelectionEvaluationResult]
+    ] = None,
+) -> Tuple[IntentMetrics, EntityMetrics, ResponseSelectionMetrics]:
+    """Adds the metrics and prediction results of a single fold to the collected ones.
+
+    The collected metrics are extended in place, hence they need to be `defaultdict`s
+    as created in `cross_validate`.
+
+    Args:
+        intent_metrics: intent metrics
+        entity_metrics: entity metrics
+        response_selection_metrics: response selection metrics
+        computed_metrics: the output of `compute_metrics` for the fold
+        intent_results: intent evaluation results
+        entity_results: entity evaluation results
+        response_selection_results: reponse selection evaluation results
+
     Returns: intent, entity, and response selection metrics
     """
     (
@@ -1509,7 +1795,7 @@ async def combine_result(
         current_intent_results,
         current_entity_results,
         current_response_selection_results,
-    ) = await compute_metrics(processor, data)
+    ) = computed_metrics
 
     if intent_results is not None:
         intent_results += current_intent_results
@@ -1521,19 +1807,155 @@ async def combine_result(
         response_selection_results += current_response_selection_results
 
     for k, v in intent_current_metrics.items():
-        intent_metrics[k] = v + intent_metrics[k]
+        intent_metrics[k].extend(v)
 
     for k, v in response_selection_current_metrics.items():
-        response_selection_metrics[k] = v + response_selection_metrics[k]
+        response_selection_metrics[k].extend(v)
 
     for extractor, extractor_metric in entity_current_metrics.items():
-        entity_metrics[extractor] = {
-            k: v + entity_metrics[extractor][k] for k, v in extractor_metric.items()
-        }
+        for k, v in extractor_metric.items():
+            entity_metrics[extractor][k].extend(v)
 
     return intent_metrics, entity_metrics, response_selection_metrics
 
 
+async def _train_and_evaluate_fold(
+    train: TrainingData, test: TrainingData, nlu_config: Text, output_path: Path
+) -> Tuple[ComputedMetrics, ComputedMetrics]:
+    """Trains a model on the training data of a fold and evaluates it.
+
+    Args:
+        train: training data of the fold
+        test: test data of the fold
+        nlu_config: path to the NLU config file
+        output_path: directory in which a temporary directory for the training data
+            file and the model of the fold is created
+
+    Returns: metrics and prediction results on the training and the test data
+    """
+    import rasa.model_training
+
+    # the model isn't needed anymore once the fold is evaluated
+    with tempfile.TemporaryDirectory(dir=output_path) as fold_directory:
+        fold_path = Path(fold_directory)
+        training_data_file = fold_path / "training_data.yml"
+        RasaYAMLWriter().dump(training_data_file, train)
+
+        model_file = rasa.model_training.train_nlu(
+            nlu_config, str(training_data_file), str(fold_path)
+        )
+
+        processor = Agent.load(model_file).processor
+
+        train_metrics = await compute_metrics(processor, train)
+        test_metrics = await compute_metrics(processor, test)
+
+    return train_metrics, test_metrics
+
+
+def _train_and_evaluate_fold_in_worker(
+    train: TrainingData,
+    test: TrainingData,
+    nlu_config: Text,
+    output_path: Path,
+    main_process_id: int,
+) -> Tuple[ComputedMetrics, ComputedMetrics]:
+    """Runs `_train_and_evaluate_fold` in a `joblib` worker process.
+
+    Args:
+        train: training data of the fold
+        test: test data of the fold
+        nlu_config: path to the NLU config file
+        output_path: directory in which a temporary directory for the training data
+            file and the model of the fold is created
+        main_process_id: id of the process which runs the cross validation
+
+    Returns: metrics and prediction results on the training and the test data
+    """
+    from rasa.engine.caching import CACHE_LOCATION_ENV
+
+    # workers which share the training cache would write to the same cache
+    # database and remove cache entries which other workers still use. `loky`
+    # reuses its worker processes, hence every worker keeps its own cache so that
+    # the folds which it trains can reuse each other's cached components.
+    # `joblib` runs the folds in the main process if it can't start workers, and
+    # the environment of the main process mustn't be changed.
+    process_id = os.getpid()
+    if process_id != main_process_id:
+        os.environ[CACHE_LOCATION_ENV] = str(output_path / f"cache-{process_id}")
+
+    train_metrics, test_metrics = asyncio.run(
+        _train_and_evaluate_fold(train, test, nlu_config, output_path)
+    )
+    return _as_picklable(train_metrics), _as_picklable(test_metrics)
+
+
+def _as_picklable(metrics: ComputedMetrics) -> ComputedMetrics:
+    """Converts the nested `defaultdict` of the entity metrics to plain dicts.
+
+    The `defaultdict` can't be pickled to send it back to the main process.
+    """
+    (
+        intent_metrics,
+        entity_metrics,
+        response_selection_metrics,
+        intent_results,
+        entity_results,
+        response_selection_results,
+    ) = metrics
+    return (
+        intent_metrics,
+        {extractor: dict(scores) for extractor, scores in entity_metrics.items()},
+        response_selection_metrics,
+        intent_results,
+        entity_results,
+        response_selection_results,
+    )
+
+
+async def _train_and_evaluate_folds(
+    folds: Iterator[Tuple[TrainingData, TrainingData]],
+    nlu_config: Text,
+    output_path: Path,
+    n_jobs: int = 1,
+) -> AsyncIterator[Tuple[ComputedMetrics, ComputedMetrics]]:
+    """Trains and evaluates a model for every cross validation fold.
+
+    Args:
+        folds: training and test data of the folds
+        nlu_config: path to the NLU config file
+        output_path: directory in which every fold gets its own temporary directory
+        n_jobs: number of worker processes which train folds in parallel (`-1` to
+            use all CPUs). If `1`, the folds are trained one after another.
+
+    Returns: metrics and prediction results on the training and the test data
+        in the order of the folds
+    """
+    fold_arguments = ((train, test, nlu_config, output_path) for train, test in folds)
+
+    if n_jobs == 1:
+        for arguments in fold_arguments:
+            yield await _train_and_evaluate_fold(*arguments)
+        return
+
+    from joblib import Parallel, delayed
+
+    # `Parallel` consumes the generator lazily, hence only the folds which are
+    # dispatched to the workers are created at a time
+    tasks = (
+        delayed(_train_and_evaluate_fold_in_worker)(*arguments, os.getpid())
+        for arguments in fold_arguments
+    )
+    loop = asyncio.get_running_loop()
+    # `Parallel` blocks until all folds are done, hence don't run it in the event
+    # loop
+    results = await loop.run_in_executor(
+        None, Parallel(n_jobs=n_jobs, backend="loky"), tasks
+    )
+    for result in results:
+        yield result
+
+
 def _contains_entity_labels(entity_results: List[EntityEvaluationResult]) -> bool:
 
     for result in entity_results:
@@ -1551,6 +1973,7 @@ async def cross_validate(
     errors: bool = False,
     disable_plotting: bool = False,
     report_as_dict: Optional[bool] = None,
+    n_jobs: int = 1,
 ) -> Tuple[CVEvaluationResult, CVEvaluationResult, CVEvaluationResult]:
     """Stratified cross validation on data.
 
@@ -1566,13 +1989,16 @@ async def cross_validate(
             If `False` the report is returned in a human-readable text format. If `None`
             `report_as_dict` is considered as `True` in case an `output_directory` is
             given.
+        n_jobs: number of worker processes which train folds in parallel (`-1` to
+            use all CPUs). Every worker trains a separate model, which can require a
+            lot of memory, hence the folds are trained one after another by default.
+            Parallel workers don't use the global training cache but a separate
+            cache per worker, which only lasts for the cross validation.
 
     Returns:
         dictionary with key, list structure, where each entry in list
               corresponds to the relevant result for one fold
     """
-    import rasa.model_training
-
     with tempfile.TemporaryDirectory() as temp_dir:
         tmp_path = Path(temp_dir)
 
@@ -1595,31 +2021,22 @@ async def cross_validate(
         entity_test_results: List[EntityEvaluationResult] = []
         response_selection_test_results: List[ResponseSelectionEvaluationResult] = []
 
-        for train, test in generate_folds(n_folds, data):
-            training_data_file = tmp_path / "training_data.yml"
-            RasaYAMLWriter().dump(training_data_file, train)
-
-            model_file = rasa.model_training.train_nlu(
-                nlu_config, str(training_data_file), str(tmp_path)
-            )
-
-            processor = Agent.load(model_file).processor
-
+        async for train_metrics, test_metrics in _train_and_evaluate_folds(
+            generate_folds(n_folds, data), nlu_config, tmp_path, n_jobs
+        ):
             # calculate train accuracy
-            await combine_result(
+            _combine_computed_metrics(
                 intent_train_metrics,
                 entity_train_metrics,
                 response_selection_train_metrics,
-                processor,
-                train,
+                train_metrics,
             )
             # calculate test accuracy
-            await combine_result(
+            _combine_computed_metrics(
                 intent_test_metrics,
                 entity_test_metrics,
                 response_selection_test_metrics,
-                processor,
-                test,
+                test_metrics,
                 intent_test_results,
                 entity_test_results,
                 response_selection_test_results,
@@ -1683,20 +2100,15 @@ def _targets_predictions_from(
     ],
     target_key: Text,
     prediction_key: Text,
-) -> Iterator[Iterable[Optional[Text]]]:
-    return zip(*[(getattr(r, target_key), getattr(r, prediction_key)) for r in results])
+) -> Tuple[List[Optional[Text]], List[Optional[Text]]]:
+    targets = [getattr(r, target_key) for r in results]
+    predictions = [getattr(r, prediction_key) for r in results]
+    return targets, predictions
 
 
 async def compute_metrics(
     processor: MessageProcessor, training_data: TrainingData
-) -> Tuple[
-    IntentMetrics,
-    EntityMetrics,
-    ResponseSelectionMetrics,
-    List[IntentEvaluationResult],
-    List[EntityEvaluationResult],
-    List[ResponseSelectionEvaluationResult],
-]:
+) -> ComputedMetrics:
     """Computes metrics for intent classification, response selection and entity
     extraction.
 
@@ -1857,13 +2269,21 @@ def _compute_metrics(
 
     Returns: metrics
     """
-    from rasa.model_testing import get_evaluation_metrics
+    from rasa.model_testing import clean_labels, encode_labels
 
     # compute fold metrics
     targets, predictions = _targets_predictions_from(
         results, target_key, prediction_key
     )
-    _, precision, f1, accuracy = get_evaluation_metrics(targets, predictions)
+    label_names, (encoded_targets, encoded_predictions) = encode_labels(
+        [clean_labels(targets), clean_labels(predictions)]
+    )
+    precision, f1, accuracy = _compute_encoded_metrics(
+        encoded_targets,
+        encoded_predictions,
+        np.unique(encoded_targets),
+        len(label_names),
+    )
 
     return {"Accuracy": [accuracy], "F1-score": [f1], "Precision": [precision]}
 
@@ -1877,7 +2297,7 @@ def _compute_entity_metrics(
         entity_results: entity evaluation results
     Returns: entity metrics
     """
-    from rasa.model_testing import get_evaluation_metrics
+    from rasa.model_testing import encode_labels
 
     entity_metric_results: EntityMetrics = defaultdict(lambda: defaultdict(list))
     extractors = _get_active_entity_extractors(entity_results)
@@ -1886,17 +2306,33 @@ def _compute_entity_metrics(
         return entity_metric_results
 
     aligned_predictions = align_all_entity_predictions(entity_results, extractors)
+    ordered_extractors = list(extractors)
+
+    # encode the target labels together with the labels of all extractors so
+    # that the metrics of every extractor can be computed on integers
+    label_names, encoded_label_lists = encode_labels(
+        [merge_labels(aligned_predictions)]
+        + [
+            merge_labels(aligned_predictions, extractor)
+            for extractor in ordered_extractors
+        ]
+    )
 
-    merged_targets = merge_labels(aligned_predictions)
-    merged_targets = substitute_labels(merged_targets, NO_ENTITY_TAG, NO_ENTITY)
-
-    for extractor in extractors:
-        merged_predictions = merge_labels(aligned_predictions, extractor)
-        merged_predictions = substitute_labels(
-            merged_predictions, NO_ENTITY_TAG, NO_ENTITY
-        )
-        _, precision, f1, accuracy = get_evaluation_metrics(
-            merged_targets, merged_predictions, exclude_label=NO_ENTITY
+    # substitute `NO_ENTITY_TAG` with `NO_ENTITY` by mapping both to the same code
+    is_no_entity = np.isin(label_names, [NO_ENTITY_TAG, NO_ENTITY])
+    if is_no_entity.any():
+        label_codes = np.arange(len(label_names))
+        label_codes[is_no_entity] = np.argmax(is_no_entity)
+        encoded_label_lists = [label_codes[ids] for ids in encoded_label_lists]
+
+    encoded_targets, *encoded_extractor_labels = encoded_label_lists
+    evaluated_labels = np.setdiff1d(encoded_targets, np.flatnonzero(is_no_entity))
+
+    for extractor, encoded_predictions in zip(
+        ordered_extractors, encoded_extractor_labels
+    ):
+        precision, f1, accuracy = _compute_encoded_metrics(
+            encoded_targets, encoded_predictions, evaluated_labels, len(label_names)
         )
         entity_metric_results[extractor]["Accuracy"].append(accuracy)
         entity_metric_results[extractor]["F1-score"].append(f1)
@@ -1905,6 +2341,50 @@ def _compute_entity_metrics(
     return entity_metric_results
 
 
+def _compute_encoded_metrics(
+    encoded_targets: np.ndarray,
+    encoded_predictions: np.ndarray,
+    evaluated_labels: np.ndarray,
+    num_labels: int,
+) -> Tuple[float, float, float]:
+    """Computes precision, f1, and accuracy of integer encoded labels.
+
+    Precision and f1 are averaged over the evaluated labels, weighted by their
+    support. The scores only need the true positives, predictions, and support of
+    every label, hence no confusion matrix is created.
+
+    Args:
+        encoded_targets: the encoded target labels
+        encoded_predictions: the encoded predicted labels
+        evaluated_labels: the encoded labels which precision and f1 are averaged over
+        num_labels: the number of distinct label codes
+
+    Returns: precision, f1, and accuracy
+    """
+    if not evaluated_labels.size:
+        logger.warning("No labels to evaluate. Skip evaluation.")
+        return 0.0, 0.0, 0.0
+
+    is_correct = encoded_targets == encoded_predictions
+    true_positives = np.bincount(encoded_targets[is_correct], minlength=num_labels)[
+        evaluated_labels
+    ]
+    predicted = np.bincount(encoded_predictions, minlength=num_labels)[evaluated_labels]
+    support = np.bincount(encoded_targets, minlength=num_labels)[evaluated_labels]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # labels which are never predicted (or never correct) get a score of 0
+        precisions = np.nan_to_num(true_positives / predicted)
+        recalls = true_positives / support
+        f1_scores = np.nan_to_num(2 * precisions * recalls / (precisions + recalls))
+
+    precision = float(np.average(precisions, weights=support))
+    f1 = float(np.average(f1_scores, weights=support))
+    accuracy = float(is_correct.mean())
+
+    return precision, f1, accuracy
+
+
 def log_results(results: IntentMetrics, dataset_name: Text) -> None:
     """Logs results of cross validation.
 
@@ -1913,8 +2393,11 @@ def log_results(results: IntentMetrics, dataset_name: Text) -> None:
         dataset_name: string of which dataset the results are from, e.g. test/train
     """
     for k, v in results.items():
+        values = np.asarray(v)
         logger.info(
-            "{} {}: {:.3f} ({:.3f})".format(dataset_name, k, np.mean(v), np.std(v))
+            "{} {}: {:.3f} ({:.3f})".format(
+                dataset_name, k, values.mean(), values.std()
+            )
         )
 
 
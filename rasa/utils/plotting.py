@@ -1,12 +1,9 @@
 import logging
-import itertools
 import os
 from functools import wraps
 
 import numpy as np
 from typing import Any, Callable, List, Optional, Text, TypeVar, Union, Tuple
-import matplotlib
-from matplotlib.ticker import FormatStrFormatter
 
 import rasa.shared.utils.io
 from rasa.constants import RESULTS_FILE
@@ -16,6 +13,10 @@ logger = logging.getLogger(__name__)
 
 def _fix_matplotlib_backend() -> None:
     """Tries to fix a broken matplotlib backend."""
+    # `matplotlib` is imported lazily as this module is imported by e.g.
+    # `rasa.nlu.test`, which doesn't need it unless something gets plotted
+    import matplotlib
+
     try:
         backend = matplotlib.get_backend()
     except Exception:  # skipcq:PYL-W0703
@@ -124,15 +125,15 @@ def plot_confusion_matrix(
         logger.info(f"Confusion matrix, without normalization: \n{confusion_matrix}")
 
     thresh = zmax / 2.0
-    for i, j in itertools.product(
-        range(confusion_matrix.shape[0]), range(confusion_matrix.shape[1])
-    ):
-        plt.text(
+    text_colors = np.where(confusion_matrix > thresh, "white", "black")
+    axes = plt.gca()
+    for i, j in np.ndindex(*confusion_matrix.shape):
+        axes.text(
             j,
             i,
             confusion_matrix[i, j],
             horizontalalignment="center",
-            color="white" if confusion_matrix[i, j] > thresh else "black",
+            color=text_colors[i, j],
         )
 
     plt.ylabel("True label")
@@ -266,6 +267,7 @@ def plot_paired_histogram(
     yticks = [float(f"{x:.2f}") for x in bins]
 
     import matplotlib.pyplot as plt
+    from matplotlib.ticker import FormatStrFormatter
 
     plt.gcf().clear()
 
@@ -1415,6 +1415,15 @@ async def test_parse_message_nlu_only(trained_moodbot_nlu_path: Text):
     assert result["intent"]["name"]
 
 
+async def test_parse_messages(trained_moodbot_nlu_path: Text):
+    processor = Agent.load(model_path=trained_moodbot_nlu_path).processor
+    messages = [UserMessage("/greet"), UserMessage("Hello"), UserMessage("bye")]
+
+    results = await processor.parse_messages(messages)
+
+    assert results == [await processor.parse_message(m) for m in messages]
+
+
 async def test_parse_message_core_only(trained_core_model: Text):
     processor = Agent.load(model_path=trained_core_model).processor
     message = UserMessage("/greet")
@@ -4,11 +4,12 @@ import sys
 import textwrap
 
 from pathlib import Path
-from typing import Text, List, Dict, Any, Set
+from typing import Text, List, Dict, Any, Set, Optional
 
 from rasa.core.agent import Agent
 from rasa.core.channels import UserMessage
 
+import numpy as np
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
 from unittest.mock import Mock
@@ -45,13 +46,14 @@ from rasa.nlu.test import (
     collect_successful_entity_predictions,
     collect_incorrect_entity_predictions,
     merge_confidences,
-    _get_entity_confidences,
     get_eval_data,
     does_token_cross_borders,
     align_entity_predictions,
     determine_intersection,
     determine_token_labels,
     _remove_entities_of_extractors,
+    _determine_entities_for_tokens,
+    determine_entity_for_token,
 )
 from rasa.nlu.tokenizers.tokenizer import Token
 from rasa.shared.constants import DEFAULT_NLU_FALLBACK_INTENT_NAME
@@ -225,67 +227,6 @@ def test_determine_token_labels_with_extractors():
     assert label == "direction"
 
 
-@pytest.mark.parametrize(
-    "token, entities, extractors, expected_confidence",
-    [
-        (
-            Token("pizza", 4),
-            [
-                {
-                    "start": 4,
-                    "end": 9,
-                    "value": "pizza",
-                    "entity": "food",
-                    "extractor": "EntityExtractorA",
-                }
-            ],
-            ["EntityExtractorA"],
-            0.0,
-        ),
-        (Token("pizza", 4), [], ["EntityExtractorA"], 0.0),
-        (
-            Token("pizza", 4),
-            [
-                {
-                    "start": 4,
-                    "end": 9,
-                    "value": "pizza",
-                    "entity": "food",
-                    "confidence_entity": 0.87,
-                    "extractor": "CRFEntityExtractor",
-                }
-            ],
-            ["CRFEntityExtractor"],
-            0.87,
-        ),
-        (
-            Token("pizza", 4),
-            [
-                {
-                    "start": 4,
-                    "end": 9,
-                    "value": "pizza",
-                    "entity": "food",
-                    "confidence_entity": 0.87,
-                    "extractor": "DIETClassifier",
-                }
-            ],
-            ["DIETClassifier"],
-            0.87,
-        ),
-    ],
-)
-def test_get_entity_confidences(
-    token: Token,
-    entities: List[Dict[Text, Any]],
-    extractors: List[Text],
-    expected_confidence: float,
-):
-    confidence = _get_entity_confidences(token, entities, extractors)
-
-    assert confidence == expected_confidence
-
-
 def test_label_merging():
     import numpy as np
 
@@ -307,6 +248,28 @@ def test_label_merging():
     )
 
 
+@pytest.mark.parametrize("extractor", [None, "EntityExtractorA"])
+def test_label_merging_with_substitution(extractor: Optional[Text]):
+    aligned_predictions = [
+        {
+            "target_labels": ["O", "O"],
+            "extractor_labels": {"EntityExtractorA": ["O", "LOC"]},
+        },
+        {
+            "target_labels": ["LOC", "O", "O"],
+            "extractor_labels": {"EntityExtractorA": ["O", "O", "O"]},
+        },
+    ]
+
+    expected = substitute_labels(
+        merge_labels(aligned_predictions, extractor), "O", "no_entity"
+    )
+
+    actual = rasa.nlu.test._merge_and_substitute_labels(aligned_predictions, extractor)
+
+    assert actual == expected
+
+
 def test_confidence_merging():
     import numpy as np
 
@@ -420,6 +383,36 @@ async def test_eval_data(
     assert len(entity_results) == 46
 
 
+@pytest.mark.parametrize("n_jobs", [2, -1, -2])
+async def test_eval_data_with_multiple_threads(trained_rasa_model: Text, n_jobs: int):
+    data = rasa.shared.nlu.training_data.loading.load_data(
+        "data/examples/rasa/demo-rasa.yml"
+    )
+
+    intent_results, _, entity_results = await get_eval_data(
+        Agent.load(trained_rasa_model).processor, data
+    )
+    # the threads have to create the prediction function of a freshly loaded
+    # model, and use small batches so that they parse batches at the same time
+    threaded_results = await get_eval_data(
+        Agent.load(trained_rasa_model).processor, data, n_jobs=n_jobs, batch_size=4
+    )
+
+    assert threaded_results[0] == intent_results
+    assert [r.entity_predictions for r in threaded_results[2]] == [
+        r.entity_predictions for r in entity_results
+    ]
+
+
+async def test_eval_data_with_zero_jobs():
+    data = rasa.shared.nlu.training_data.loading.load_data(
+        "data/examples/rasa/demo-rasa.yml"
+    )
+
+    with pytest.raises(ValueError):
+        await get_eval_data(Mock(), data, n_jobs=0)
+
+
 @pytest.mark.timeout(
     240, func_only=True
 )  # these can take a longer time than the default timeout
@@ -464,6 +457,48 @@ async def test_run_cv_evaluation():
         assert all(key in extractor_evaluation for key in ["errors", "report"])
 
 
+@pytest.mark.timeout(
+    240, func_only=True
+)  # these can take a longer time than the default timeout
+async def test_run_cv_evaluation_with_multiple_jobs():
+    td = rasa.shared.nlu.training_data.loading.load_data(
+        "data/test/demo-rasa-more-ents-and-multiplied.yml"
+    )
+
+    nlu_config = {
+        "language": "en",
+        "pipeline": [
+            {"name": "WhitespaceTokenizer"},
+            {"name": "CountVectorsFeaturizer"},
+            {"name": "DIETClassifier", EPOCHS: 2},
+        ],
+    }
+
+    n_folds = 2
+    intent_results, entity_results, _ = await cross_validate(
+        td,
+        n_folds,
+        nlu_config,
+        successes=False,
+        errors=False,
+        disable_plotting=True,
+        report_as_dict=True,
+        n_jobs=2,
+    )
+
+    expected_metrics = {"Accuracy", "Precision", "F1-score"}
+    for metrics in [intent_results.train, intent_results.test]:
+        assert metrics.keys() == expected_metrics
+        assert all(len(values) == n_folds for values in metrics.values())
+    assert entity_results.train
+    assert entity_results.train.keys() == entity_results.test.keys()
+    for metrics in [*entity_results.train.values(), *entity_results.test.values()]:
+        assert metrics.keys() == expected_metrics
+        assert all(len(values) == n_folds for values in metrics.values())
+    # every example is in the test data of exactly one fold
+    assert len(intent_results.evaluation["predictions"]) == len(td.intent_examples)
+
+
 @pytest.mark.timeout(
     180, func_only=True
 )  # these can take a longer time than the default timeout
@@ -949,6 +984,164 @@ def test_evaluate_entities_cv():
     }, "Wrong entity prediction alignment"
 
 
+@pytest.mark.parametrize(
+    "tokens, entities, extractors",
+    [
+        (EN_tokens, EN_targets, None),
+        (EN_tokens, list(reversed(EN_predicted)), {"EntityExtractorA"}),
+        (EN_tokens, EN_predicted, {"EntityExtractorB"}),
+        (CH_wrong_segmentation, [CH_correct_entity, CH_wrong_entity], {"A"}),
+        (CH_correct_segmentation, [CH_wrong_entity, CH_correct_entity], {"A"}),
+        (list(reversed(EN_tokens)), EN_targets, None),
+        (EN_tokens, [], None),
+    ],
+)
+def test_determine_entities_for_tokens(
+    tokens: List[Token],
+    entities: List[Dict[Text, Any]],
+    extractors: Optional[Set[Text]],
+):
+    expected = [
+        determine_entity_for_token(token, entities, extractors) for token in tokens
+    ]
+
+    assert _determine_entities_for_tokens(tokens, entities, extractors) == expected
+
+
+@pytest.mark.parametrize("exclude_label", [None, "greet"])
+def test_calculate_report(exclude_label: Optional[Text]):
+    import sklearn.metrics
+
+    targets = ["greet", "goodbye", "greet", "affirm", "greet"]
+    predictions = ["greet", "greet", "", "affirm", "deny"]
+
+    (
+        report,
+        precision,
+        f1,
+        accuracy,
+        confusion_matrix,
+        labels,
+    ) = rasa.nlu.test._calculate_report(
+        None, targets, predictions, report_as_dict=True, exclude_label=exclude_label
+    )
+
+    assert list(labels) == ["", "affirm", "deny", "goodbye", "greet"]
+    assert (
+        confusion_matrix == sklearn.metrics.confusion_matrix(targets, predictions)
+    ).all()
+
+    evaluated_labels = sorted(set(targets) - {exclude_label})
+    expected_scores = sklearn.metrics.precision_recall_fscore_support(
+        targets, predictions, labels=evaluated_labels, average="weighted"
+    )
+    assert precision == pytest.approx(expected_scores[0])
+    assert f1 == pytest.approx(expected_scores[2])
+    assert accuracy == pytest.approx(
+        sklearn.metrics.accuracy_score(targets, predictions)
+    )
+
+    for label_report in report.values():
+        if isinstance(label_report, dict):
+            label_report.pop("confused_with", None)
+    assert report == sklearn.metrics.classification_report(
+        targets, predictions, labels=evaluated_labels, output_dict=True
+    )
+
+
+def test_compute_encoded_metrics():
+    import sklearn.metrics
+
+    targets = np.array([0, 1, 0, 2, 0, 3, 3])
+    predictions = np.array([0, 0, 3, 2, 1, 3, 0])
+    evaluated_labels = np.array([0, 2, 3])
+
+    precision, f1, accuracy = rasa.nlu.test._compute_encoded_metrics(
+        targets, predictions, evaluated_labels, num_labels=4
+    )
+
+    expected = sklearn.metrics.precision_recall_fscore_support(
+        targets, predictions, labels=evaluated_labels, average="weighted"
+    )
+    assert precision == pytest.approx(expected[0])
+    assert f1 == pytest.approx(expected[2])
+    assert accuracy == sklearn.metrics.accuracy_score(targets, predictions)
+
+
+def test_compute_entity_metrics(monkeypatch: MonkeyPatch):
+    from rasa.model_testing import get_evaluation_metrics
+
+    aligned_predictions = [
+        {
+            "target_labels": ["O", "LOC", "no_entity", "PER"],
+            "extractor_labels": {
+                "EntityExtractorA": ["LOC", "LOC", "O", "O"],
+                "EntityExtractorB": ["no_entity", "PER", "O", "PER"],
+            },
+        },
+        {
+            "target_labels": ["LOC", "O", "O"],
+            "extractor_labels": {
+                "EntityExtractorA": ["LOC", "no_entity", "PER"],
+                "EntityExtractorB": ["O", "O", "O"],
+            },
+        },
+    ]
+    monkeypatch.setattr(
+        rasa.nlu.test,
+        "align_all_entity_predictions",
+        lambda entity_results, extractors: aligned_predictions,
+    )
+    entity_results = [
+        EntityEvaluationResult(
+            [],
+            [{EXTRACTOR: "EntityExtractorA"}, {EXTRACTOR: "EntityExtractorB"}],
+            [],
+            "",
+        )
+    ]
+
+    metrics = rasa.nlu.test._compute_entity_metrics(entity_results)
+
+    targets = substitute_labels(merge_labels(aligned_predictions), "O", NO_ENTITY)
+    assert set(metrics.keys()) == {"EntityExtractorA", "EntityExtractorB"}
+    for extractor, extractor_metrics in metrics.items():
+        predictions = substitute_labels(
+            merge_labels(aligned_predictions, extractor), "O", NO_ENTITY
+        )
+        _, precision, f1, accuracy = get_evaluation_metrics(
+            targets, predictions, exclude_label=NO_ENTITY
+        )
+        assert extractor_metrics["Precision"] == [pytest.approx(precision)]
+        assert extractor_metrics["F1-score"] == [pytest.approx(f1)]
+        assert extractor_metrics["Accuracy"] == [pytest.approx(accuracy)]
+
+
+def test_compute_metrics_with_empty_labels():
+    from rasa.model_testing import get_evaluation_metrics
+
+    intent_results = [
+        IntentEvaluationResult("greet", "greet", "hello", 0.98),
+        IntentEvaluationResult("greet", None, "hi", 0.0),
+        IntentEvaluationResult("", "goodbye", "bye", 0.5),
+        IntentEvaluationResult(None, "", "ciao", 0.0),
+        IntentEvaluationResult("goodbye", "goodbye", "see you", 0.9),
+        IntentEvaluationResult("affirm", "greet", "yes", 0.4),
+    ]
+
+    metrics = rasa.nlu.test._compute_metrics(
+        intent_results, "intent_target", "intent_prediction"
+    )
+
+    _, precision, f1, accuracy = get_evaluation_metrics(
+        [r.intent_target for r in intent_results],
+        [r.intent_prediction for r in intent_results],
+    )
+    assert metrics["Precision"] == [pytest.approx(precision)]
+    assert metrics["F1-score"] == [pytest.approx(f1)]
+    assert metrics["Accuracy"] == [pytest.approx(accuracy)]
+
+
 def test_label_replacement():
     original_labels = ["O", "location"]
     target_labels = ["no_entity", "location"]
@@ -1181,6 +1374,11 @@ class ConstantProcessor:
     ) -> Dict[Text, Any]:
         return self.prediction
 
+    async def parse_messages(
+        self, messages: List[UserMessage], only_output_properties: bool = True,
+    ) -> List[Dict[Text, Any]]:
+        return [self.prediction for _ in messages]
+
 
 async def test_replacing_fallback_intent():
     expected_intent = "greet"
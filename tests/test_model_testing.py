@@ -153,6 +153,24 @@ def test_get_label_set(targets, exclude_label, expected):
     assert set(expected) == set(actual)
 
 
+def test_encode_labels_and_get_confusion_matrix():
+    import sklearn.metrics
+    from rasa.model_testing import encode_labels, get_confusion_matrix
+
+    targets = ["greet", "goodbye", "greet", "affirm"]
+    predictions = ["greet", "greet", "", "affirm"]
+
+    labels, (target_ids, prediction_ids) = encode_labels([targets, predictions])
+
+    assert list(labels) == ["", "affirm", "goodbye", "greet"]
+    assert list(labels[target_ids]) == targets
+    assert list(labels[prediction_ids]) == predictions
+    assert (
+        get_confusion_matrix(target_ids, prediction_ids, len(labels))
+        == sklearn.metrics.confusion_matrix(targets, predictions)
+    ).all()
+
+
 async def test_e2e_warning_if_no_nlu_model(
     monkeypatch: MonkeyPatch, trained_core_model: Text, capsys: CaptureFixture
 ):